@@ -2,14 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from datetime import datetime, timedelta
-import random
-import json
-import os
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from datetime import datetime
+import re
 import folium
+from folium.plugins import MarkerCluster
 from streamlit_folium import folium_static
-import requests
-from io import StringIO
 
 # --- Configuration and Page Setup ---
 st.set_page_config(
@@ -20,176 +19,248 @@ st.title("Transparency & Insights: Heidelberg Council Data")
 st.markdown("""
 Welcome to the interactive dashboard for Heidelberg City Council data. This application provides insights into various aspects of city governance, including projects, and decisions. Use the sidebar to navigate between data categories and filter the visualizations.
 
-Note: Data for **Decisions** and **People** is loaded from the provided JSON files. Other sections use simulated data for demonstration purposes.
+Note: Data for **Decisions** and **People** is loaded from Parquet files converted from the provided OParl JSON files. Other sections use simulated data for demonstration purposes.
 """)
 
 # --- Define the base directory for the data files ---
 # This path is updated to point to the raw content on GitHub
 BASE_PATH = 'https://raw.githubusercontent.com/AzadehHa/Data4HD/main/'
 
+# Parliamentary group prefixes stripped from organization names for display
+ORG_PREFIX_PATTERN = re.compile(r'^(Fraktion der |Fraktionsgemeinschaft )')
+
 # --- Data Loading and Preprocessing Functions (using real data) ---
 
-@st.cache_data
+def to_arrow_strings(df):
+    """
+    Converts the string columns of a DataFrame to Arrow-backed strings.
+    Datetime, numeric and category columns stay NumPy-backed for the vectorized filters below.
+    """
+    string_cols = df.select_dtypes(include=['object', 'string']).columns
+    return df.astype(df[string_cols].convert_dtypes(dtype_backend='pyarrow').dtypes.to_dict())
+
+@st.cache_data(persist='disk', show_spinner=False)
 def load_and_preprocess_decisions():
     """
-    Loads and preprocesses council decisions data from provided JSON file from GitHub.
+    Loads and preprocesses council decisions data from the Parquet file on GitHub.
+    The Parquet file is generated from the OParl JSON export by convert_json_to_parquet.py.
     """
-    file_name = 'tagesordnungspunkte-ratsinformationssystem-stadt-heidelberg-oparl_33f7b659-43f4-4d57-b43b-30ed5d7802d6.json'
-    file_url = BASE_PATH + file_name
-    
     try:
-        response = requests.get(file_url)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+        df = to_arrow_strings(pd.read_parquet(BASE_PATH + 'decisions.parquet', engine='pyarrow', columns=['created', 'result', 'name']))
         
-        # Use StringIO to read the response content as a file
-        data = json.load(StringIO(response.text))
-        df = pd.DataFrame(data['data'])
+        # Clean and process data ('created' is already stored as naive UTC datetime64)
+        df['created_day'] = df['created'].values.astype('datetime64[D]')
+        # Derive the status and the "has a real result" mask in one pass over the raw NumPy array
+        result = df['result'].to_numpy()
+        status = np.where(pd.isna(result), 'No result', np.char.strip(result.astype(str)))
+        df['status'] = pd.Categorical(status)
+        mask = ~np.isin(status, np.array(['No result', 'Kenntnis genommen']))
+        df_filtered = df.loc[mask]
+        status_options = tuple(np.unique(status[mask]).tolist())
         
-        # Clean and process data
-        df['created'] = pd.to_datetime(df['created']).dt.tz_convert(None)
-        df['status'] = df['result'].fillna('No result').str.strip()
-        df_filtered = df[~df['status'].isin(['No result', 'Kenntnis genommen'])]
-        
-        return df, df_filtered
-    except requests.exceptions.RequestException as e:
+        return df, df_filtered, status_options
+    except OSError as e:
         st.error(f"Failed to fetch decisions data from GitHub: {e}")
-        return pd.DataFrame(), pd.DataFrame()
-    except json.JSONDecodeError as e:
-        st.error(f"Error decoding JSON from decisions data file: {e}")
-        return pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame(), ()
+    except ValueError as e:
+        st.error(f"Error reading Parquet from decisions data file: {e}")
+        return pd.DataFrame(), pd.DataFrame(), ()
 
-@st.cache_data
+@st.cache_data(persist='disk', show_spinner=False)
 def load_and_preprocess_people():
     """
     Loads and preprocesses council members and their organization data from GitHub.
+    The Parquet files are generated from the OParl JSON exports by convert_json_to_parquet.py.
     """
     try:
-        people_url = BASE_PATH + 'personen-ratsinformationssystem-stadt-heidelberg-oparl_f4cff9e2-a2fc-4ba9-a7b0-955e312b72cd.json'
-        org_url = BASE_PATH + 'organisationen-ratsinformationssystem-stadt-heidelberg-oparl_c9b68473-42c7-4992-a574-6618caba978c.json'
-        membership_url = BASE_PATH + 'mitgliedschaften-ratsinformationssystem-stadt-heidelberg-oparl_8c2e8115-15bf-4a03-858a-a4277df36b87.json'
-
-        # Fetch and load each JSON file
-        def fetch_json(url):
-            response = requests.get(url)
-            response.raise_for_status()
-            return json.load(StringIO(response.text))['data']
-
-        people_data = fetch_json(people_url)
-        org_data = fetch_json(org_url)
-        membership_data = fetch_json(membership_url)
-
-        # Create DataFrames
-        df_people = pd.DataFrame(people_data)
-        df_orgs = pd.DataFrame(org_data)
-        df_memberships = pd.DataFrame(membership_data)
-
-        # Merge memberships with people data first
-        df_members = df_memberships.merge(
-            df_people[['id', 'name']],
-            left_on='person',
-            right_on='id',
-            how='left'
-        ).rename(columns={'name': 'name_person'})
-
-        # Now merge the result with organizations data
-        df_members = df_members.merge(
-            df_orgs[['id', 'name']],
-            left_on='organization',
-            right_on='id',
-            how='left'
-        ).rename(columns={'name': 'name_org'})
-
-        # Select final columns and rename for display
-        df_members_final = df_members[['name_person', 'name_org', 'role', 'startDate']]
-        df_members_final.columns = ['Name', 'Organization', 'Role', 'Start Date']
-        df_members_final = df_members_final.fillna('Unknown')
-        df_members_final['Organization'] = df_members_final['Organization'].str.replace('Fraktion der ', '').str.replace('Fraktionsgemeinschaft ', '')
+        df_people = pd.read_parquet(BASE_PATH + 'people.parquet', engine='pyarrow', columns=['id', 'name'])
+        df_orgs = pd.read_parquet(BASE_PATH + 'orgs.parquet', engine='pyarrow', columns=['id', 'name'])
+        df_memberships = pd.read_parquet(
+            BASE_PATH + 'memberships.parquet',
+            engine='pyarrow',
+            columns=['person', 'organization', 'role', 'startDate']
+        )
+
+        # Look up person and organization names via id-indexed Series instead of merging
+        people_lookup = df_people.set_index('id')['name']
+        org_lookup = df_orgs.set_index('id')['name']
+        org_names = df_memberships['organization'].map(org_lookup).fillna('Unknown')
+        # Strip prefixes once per distinct organization name rather than once per row
+        org_remap = {org: ORG_PREFIX_PATTERN.sub('', org) for org in org_names.unique()}
+
+        # Build the display frame in one construction
+        df_members_final = to_arrow_strings(pd.DataFrame({
+            'Name': df_memberships['person'].map(people_lookup).fillna('Unknown'),
+            'Organization': org_names.map(org_remap).astype('category'),
+            'Role': df_memberships['role'].fillna('Unknown'),
+            'Start Date': df_memberships['startDate'].fillna('Unknown')
+        }))
+        org_options = tuple(df_members_final['Organization'].cat.categories)
         
-        return df_members_final
-    except requests.exceptions.RequestException as e:
+        return df_members_final, org_options
+    except OSError as e:
         st.error(f"Failed to fetch people/organizations data from GitHub: {e}")
-        return pd.DataFrame()
-    except json.JSONDecodeError as e:
-        st.error(f"Error decoding JSON from a people/organizations data file: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), ()
+    except ValueError as e:
+        st.error(f"Error reading Parquet from a people/organizations data file: {e}")
+        return pd.DataFrame(), ()
 
 # The rest of the code remains the same as it uses simulated data or the new functions above.
 
 # --- Data Simulation Functions (kept for categories without provided data) ---
-@st.cache_data
+@st.cache_data(persist='disk', show_spinner=False)
 def load_and_preprocess_budgets():
-    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual budget data.")
+    rng = np.random.default_rng(0)
     financial_years = pd.to_datetime(np.repeat([f'202{i}-01-01' for i in range(1, 5)], 5))
     departments = ['Administration', 'Public Services', 'Culture & Education', 'Infrastructure', 'Community Projects'] * 4
     data = {
         'financial_year': financial_years,
         'department': departments,
-        'planned_budget': np.random.randint(100, 500, size=20) * 1000000,
-        'expenditure': np.random.randint(80, 450, size=20) * 1000000
+        'planned_budget': rng.integers(100, 500, size=20) * 1000000,
+        'expenditure': rng.integers(80, 450, size=20) * 1000000
     }
     df = pd.DataFrame(data)
     df['efficiency'] = (df['expenditure'] / df['planned_budget']) * 100
-    return df
+    df['department'] = df['department'].astype('category')
+    return df, tuple(df['department'].cat.categories)
 
-@st.cache_data
+@st.cache_data(persist='disk', show_spinner=False)
 def load_and_preprocess_projects():
-    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual project data.")
+    rng = np.random.default_rng(0)
     start_date = datetime(2022, 1, 1)
-    end_date = datetime.now()
     project_names = [f'Project {i+1}' for i in range(30)]
     data = {
         'project_name': project_names,
-        'start_date': [start_date + timedelta(days=random.randint(0, 700)) for _ in range(30)],
-        'status': [random.choice(['Ongoing', 'Completed', 'Planned']) for _ in range(30)],
-        'department': [random.choice(['Planning', 'Public Works', 'Community']) for _ in range(30)],
-        'progress_percent': [random.randint(0, 100) if random.choice([True, False]) else None for _ in range(30)],
-        'latitude': [random.uniform(49.38, 49.42) for _ in range(30)],
-        'longitude': [random.uniform(8.65, 8.72) for _ in range(30)]
+        'start_date': start_date + pd.to_timedelta(rng.integers(0, 700, 30), unit='D'),
+        'status': rng.choice(['Ongoing', 'Completed', 'Planned'], 30),
+        'department': rng.choice(['Planning', 'Public Works', 'Community'], 30),
+        'progress_percent': np.where(rng.random(30) < 0.5, rng.integers(0, 101, 30), np.nan),
+        'latitude': rng.uniform(49.38, 49.42, 30),
+        'longitude': rng.uniform(8.65, 8.72, 30)
     }
     df = pd.DataFrame(data)
-    return df
+    df['status'] = df['status'].astype('category')
+    df['department'] = df['department'].astype('category')
+    df = to_arrow_strings(df)
+    return df, tuple(df['status'].cat.categories)
 
-@st.cache_data
+@st.cache_data(persist='disk', show_spinner=False)
 def load_and_preprocess_services():
-    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual service data.")
+    rng = np.random.default_rng(0)
     services = ['Housing', 'Waste Management', 'Education', 'Culture', 'Transport']
     data = {
         'year': np.repeat(np.arange(2021, 2025), len(services)),
         'service_type': services * 4,
-        'planned_usage': np.random.randint(1000, 5000, size=20),
-        'actual_usage': np.random.randint(900, 5200, size=20)
+        'planned_usage': rng.integers(1000, 5000, size=20),
+        'actual_usage': rng.integers(900, 5200, size=20)
     }
     df = pd.DataFrame(data)
-    return df
+    df['service_type'] = df['service_type'].astype('category')
+    return df, tuple(df['service_type'].cat.categories)
 
-@st.cache_data
+@st.cache_data(persist='disk', show_spinner=False)
 def load_and_preprocess_demographics():
-    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual demographic data.")
+    rng = np.random.default_rng(0)
     age_groups = ['0-14', '15-29', '30-44', '45-59', '60-74', '75+']
     years = [2018, 2019, 2020, 2021, 2022, 2023]
     data = {
         'year': np.repeat(years, len(age_groups)),
         'age_group': age_groups * len(years),
-        'population': np.random.randint(10000, 30000, size=len(age_groups) * len(years)),
-        'migration_in': np.random.randint(500, 2000, size=len(age_groups) * len(years)),
-        'migration_out': np.random.randint(400, 1800, size=len(age_groups) * len(years)),
+        'population': rng.integers(10000, 30000, size=len(age_groups) * len(years)),
+        'migration_in': rng.integers(500, 2000, size=len(age_groups) * len(years)),
+        'migration_out': rng.integers(400, 1800, size=len(age_groups) * len(years)),
     }
     df = pd.DataFrame(data)
+    df['age_group'] = df['age_group'].astype('category')
     return df
 
-# --- Sidebar for Navigation ---
-st.sidebar.header("Explore Data Categories")
-category = st.sidebar.radio(
-    "Select a category:",
-    ["Decisions", "People", "Budgets", "Projects", "Services", "Demographics"]
-)
+# --- Cached Derived Views (keyed on the filter state) ---
+@st.cache_data
+def filter_decisions(df, d0, d1, statuses_tuple):
+    """
+    Filters decisions to the given date range and to the selected statuses.
+    d0 and d1 are np.datetime64 day values compared against the precomputed 'created_day' column.
+    """
+    if d0 is not None and d1 is not None:
+        df = df[(df['created_day'] >= d0) & (df['created_day'] <= d1)]
+    return df[df['status'].isin(statuses_tuple)]
 
-# --- Dynamic Content based on selected category ---
-st.sidebar.markdown("---")
-st.sidebar.header("Filter Options")
+@st.cache_data
+def monthly_trend(df):
+    """
+    Counts decisions per calendar month.
+    """
+    decision_trend = df.set_index('created').resample('MS').size().rename('count').reset_index()
+    decision_trend['created'] = decision_trend['created'].dt.strftime('%Y-%m')
+    return decision_trend
+
+# The frame argument is not hashed for these aggregates; the key tuple must identify the
+# filter state that produced it, so a rerun with an unchanged filter is a plain cache lookup.
+@st.cache_data(hash_funcs={pd.DataFrame: lambda _: None})
+def counts_by_status(df: pd.DataFrame, key: tuple):
+    """
+    Counts decisions per status.
+    """
+    return df['status'].cat.remove_unused_categories().value_counts().rename_axis('status').reset_index(name='count')
 
-if category == "Decisions":
-    df_all_decisions, df_decisions = load_and_preprocess_decisions()
+@st.cache_data(hash_funcs={pd.DataFrame: lambda _: None})
+def members_by_org(df: pd.DataFrame, key: tuple):
+    """
+    Counts distinct members per organization.
+    """
+    return df.groupby('Organization', observed=True, sort=False)['Name'].nunique().reset_index(name='count')
+
+# --- Plotting Helpers ---
+# Line traces longer than this are downsampled before being handed to Plotly
+MAX_TREND_POINTS = 1000
+
+def lttb_indices(x, y, n_out):
+    """
+    Selects the indices of n_out points that preserve the visual shape of the series
+    using Largest-Triangle-Three-Buckets. The first and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Split the interior points into n_out - 2 buckets and keep one point per bucket
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+@st.cache_resource(hash_funcs={np.ndarray: lambda a: a.tobytes()}, max_entries=100)
+def build_decisions_trend_fig(key: tuple, x, y):
+    """
+    Builds the monthly decisions trend figure. Reruns with the same filter state
+    reuse the built figure instead of constructing it again.
+    """
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode='lines'))
+    fig.update_layout(
+        title='Number of Decisions Per Month',
+        template='plotly_white',
+        xaxis_title='Month',
+        yaxis_title='Number of Decisions'
+    )
+    return fig
+
+# --- Category Views ---
+# Each view is a fragment, so changing one of its filters reruns only that view, not the whole script
+@st.fragment
+def _decisions_view():
+    df_all_decisions, df_decisions, status_options = load_and_preprocess_decisions()
     st.subheader("Council Decisions")
 
     if not df_all_decisions.empty:
@@ -204,17 +275,14 @@ if category == "Decisions":
         )
 
         if len(date_range) == 2:
-            filtered_df = df_decisions[
-                (df_decisions['created'].dt.date >= date_range[0]) &
-                (df_decisions['created'].dt.date <= date_range[1])
-            ]
+            d0, d1 = np.datetime64(date_range[0]), np.datetime64(date_range[1])
         else:
-            filtered_df = df_decisions
+            d0, d1 = None, None
 
         # Status filter
-        status_options = sorted(filtered_df['status'].unique())
         selected_statuses = st.sidebar.multiselect("Filter by Status:", status_options, default=status_options)
-        filtered_df = filtered_df[filtered_df['status'].isin(selected_statuses)]
+        statuses_key = tuple(sorted(selected_statuses))
+        filtered_df = filter_decisions(df_decisions, d0, d1, statuses_key)
         
         # KPIs
         st.markdown("### Key Metrics")
@@ -229,33 +297,28 @@ if category == "Decisions":
 
         # Visualizations
         st.markdown("### Decision Trends Over Time")
-        decision_trend = filtered_df.groupby(filtered_df['created'].dt.to_period('M')).size().reset_index(name='count')
-        decision_trend['created'] = decision_trend['created'].astype(str)
-        fig_line = px.line(
-            decision_trend,
-            x='created',
-            y='count',
-            title='Number of Decisions Per Month',
-            labels={'created': 'Month', 'count': 'Number of Decisions'},
-            template='plotly_white',
-        )
+        decision_trend = monthly_trend(filtered_df)
+        # Fixed-width unicode rather than object dtype so the labels hash by value
+        trend_x = decision_trend['created'].to_numpy(dtype=str)
+        trend_y = decision_trend['count'].to_numpy()
+        if len(trend_y) > MAX_TREND_POINTS:
+            keep = lttb_indices(np.arange(len(trend_y)), trend_y, MAX_TREND_POINTS)
+            trend_x, trend_y = trend_x[keep], trend_y[keep]
+        fig_line = build_decisions_trend_fig((d0, d1, statuses_key), trend_x, trend_y)
         st.plotly_chart(fig_line, use_container_width=True)
 
         st.markdown("### Decision Status Distribution")
-        status_counts = filtered_df['status'].value_counts().reset_index()
-        status_counts.columns = ['status', 'count']
+        status_count_df = counts_by_status(filtered_df, (d0, d1, statuses_key))
         
-        fig_bar = px.bar(
-            status_counts,
-            x='count',
-            y='status',
+        fig_bar = go.Figure(go.Bar(
+            x=status_count_df['count'].to_numpy(),
+            y=status_count_df['status'].to_numpy(),
             orientation='h',
-            text='count',
-            title='Distribution of Decision Statuses',
-            labels={'count': 'Number of Decisions', 'status': 'Decision Status'},
-            color_discrete_sequence=px.colors.qualitative.Plotly
-        )
+            text=status_count_df['count'].to_numpy(),
+            marker_color=px.colors.qualitative.Plotly[0]
+        ))
         fig_bar.update_layout(
+            title='Distribution of Decision Statuses',
             yaxis={'categoryorder': 'total ascending'},
             xaxis_title="Number of Decisions",
             yaxis_title=""
@@ -264,20 +327,23 @@ if category == "Decisions":
 
         st.markdown("---")
         st.markdown("### 💡 Insights")
-        if not status_counts.empty:
-            most_common_status = status_counts.loc[status_counts['count'].idxmax()]
+        if not status_count_df.empty:
+            most_common_status = status_count_df.loc[status_count_df['count'].idxmax()]
             st.write(f"The most frequent decision status is **'{most_common_status['status']}'**.")
         
         st.markdown("### Full List of Filtered Decisions")
         st.dataframe(filtered_df[['name', 'status', 'created']].sort_values(by='created', ascending=False), use_container_width=True)
+    else:
+        # Persisted caches have no TTL, so drop a failed load to retry it on the next rerun
+        load_and_preprocess_decisions.clear()
 
-elif category == "People":
-    df_members = load_and_preprocess_people()
+@st.fragment
+def _people_view():
+    df_members, org_options = load_and_preprocess_people()
     st.subheader("Heidelberg City Council Members")
 
     if not df_members.empty:
         # Organization filter
-        org_options = sorted(df_members['Organization'].unique())
         selected_orgs = st.sidebar.multiselect("Filter by Organization/Party:", org_options, default=org_options)
         filtered_df = df_members[df_members['Organization'].isin(selected_orgs)]
 
@@ -291,24 +357,31 @@ elif category == "People":
 
         # Visualizations
         st.markdown("### Members by Organization")
-        org_counts = filtered_df.groupby('Organization')['Name'].nunique().reset_index(name='count')
+        org_counts = members_by_org(filtered_df, tuple(sorted(selected_orgs)))
         
-        fig_bar = px.bar(
-            org_counts.sort_values('count', ascending=False),
-            x='count',
-            y='Organization',
-            orientation='h',
+        org_counts = org_counts.sort_values('count', ascending=False)
+        fig_bar = go.Figure(go.Bar(
+            x=org_counts['count'].to_numpy(),
+            y=org_counts['Organization'].to_numpy(),
+            orientation='h'
+        ))
+        fig_bar.update_layout(
             title='Number of Members by Political Organization',
-            labels={'count': 'Number of Members', 'Organization': 'Organization'},
-            template='plotly_white'
+            template='plotly_white',
+            xaxis_title='Number of Members',
+            yaxis_title='Organization'
         )
         st.plotly_chart(fig_bar, use_container_width=True)
 
         st.markdown("### List of Council Members")
         st.dataframe(filtered_df[['Name', 'Organization']].sort_values(by='Organization'), use_container_width=True)
+    else:
+        load_and_preprocess_people.clear()
 
-elif category == "Budgets":
-    df_budgets = load_and_preprocess_budgets()
+@st.fragment
+def _budgets_view():
+    df_budgets, departments = load_and_preprocess_budgets()
+    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual budget data.")
     st.subheader("Budgets & Expenditures (Simulated Data)")
 
     # Time range slider
@@ -325,7 +398,6 @@ elif category == "Budgets":
     ]
 
     # Department filter
-    departments = filtered_df['department'].unique()
     selected_departments = st.sidebar.multiselect("Filter by Department:", departments, default=departments)
     filtered_df = filtered_df[filtered_df['department'].isin(selected_departments)]
 
@@ -342,18 +414,26 @@ elif category == "Budgets":
     # Visualizations
     st.markdown("### Budget Trends Over Time")
     budget_trend_df = filtered_df.groupby('financial_year')[['planned_budget', 'expenditure']].sum().reset_index()
-    fig_line = px.line(
-        budget_trend_df,
-        x='financial_year',
-        y=['planned_budget', 'expenditure'],
+    fig_line = go.Figure([
+        go.Scattergl(
+            x=budget_trend_df['financial_year'].to_numpy(),
+            y=budget_trend_df[column].to_numpy(),
+            mode='lines',
+            name=column
+        )
+        for column in ['planned_budget', 'expenditure']
+    ])
+    fig_line.update_layout(
         title='Budget vs. Expenditure Over Time',
-        labels={'value': 'Amount (€)', 'financial_year': 'Financial Year', 'variable': 'Type'},
         template='plotly_white',
+        xaxis_title='Financial Year',
+        yaxis_title='Amount (€)',
+        legend_title_text='Type'
     )
     st.plotly_chart(fig_line, use_container_width=True)
 
     st.markdown("### Departmental Expenditure Distribution")
-    dept_expenditure = filtered_df.groupby('department')['expenditure'].sum().reset_index()
+    dept_expenditure = filtered_df.groupby('department', observed=True, sort=False)['expenditure'].sum().reset_index()
     fig_pie = px.pie(
         dept_expenditure,
         values='expenditure',
@@ -371,12 +451,13 @@ elif category == "Budgets":
     highest_spending_dept = dept_expenditure.loc[dept_expenditure['expenditure'].idxmax()]
     st.write(f"The department with the highest total expenditure is **{highest_spending_dept['department']}**.")
 
-elif category == "Projects":
-    df_projects = load_and_preprocess_projects()
+@st.fragment
+def _projects_view():
+    df_projects, status_options = load_and_preprocess_projects()
+    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual project data.")
     st.subheader("Community Projects & Initiatives (Simulated Data)")
 
     # Project status filter
-    status_options = df_projects['status'].unique()
     selected_status = st.sidebar.multiselect("Filter by Project Status:", status_options, default=status_options)
     filtered_df = df_projects[df_projects['status'].isin(selected_status)]
 
@@ -392,37 +473,46 @@ elif category == "Projects":
 
     # Visualizations
     st.markdown("### Project Status Overview")
-    status_counts = filtered_df['status'].value_counts().reset_index()
-    status_counts.columns = ['status', 'count']
-    fig_bar = px.bar(
-        status_counts,
-        x='status',
-        y='count',
+    status_count_df = filtered_df['status'].cat.remove_unused_categories().value_counts().reset_index()
+    status_count_df.columns = ['status', 'count']
+    fig_bar = go.Figure(go.Bar(
+        x=status_count_df['status'].to_numpy(),
+        y=status_count_df['count'].to_numpy(),
+        marker_color=px.colors.qualitative.Plotly[:len(status_count_df)]
+    ))
+    fig_bar.update_layout(
         title='Number of Projects by Status',
-        labels={'status': 'Status', 'count': 'Number of Projects'},
-        color='status',
         template='plotly_white',
+        xaxis_title='Status',
+        yaxis_title='Number of Projects'
     )
     st.plotly_chart(fig_bar, use_container_width=True)
     
     st.markdown("### Geographic Distribution of Projects ")
     m = folium.Map(location=[49.4076, 8.6908], zoom_start=13)
-    for index, row in filtered_df.iterrows():
-        if pd.notna(row['latitude']) and pd.notna(row['longitude']):
-            folium.Marker(
-                location=[row['latitude'], row['longitude']],
-                popup=f"Project: {row['project_name']}<br>Status: {row['status']}",
-                icon=folium.Icon(color='blue', icon='info-sign')
-            ).add_to(m)
+    located_df = filtered_df.dropna(subset=['latitude', 'longitude'])
+    coords = located_df[['latitude', 'longitude']].to_numpy().tolist()
+    popups = [
+        f"Project: {name}<br>Status: {status}"
+        for name, status in zip(located_df['project_name'].to_numpy(), located_df['status'].to_numpy())
+    ]
+    # MarkerCluster rejects an empty location list, so leave the map bare when nothing is selected
+    if coords:
+        MarkerCluster(
+            locations=coords,
+            popups=popups,
+            icons=[folium.Icon(color='blue', icon='info-sign') for _ in coords]
+        ).add_to(m)
     
     folium_static(m)
 
-elif category == "Services":
-    df_services = load_and_preprocess_services()
+@st.fragment
+def _services_view():
+    df_services, service_options = load_and_preprocess_services()
+    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual service data.")
     st.subheader("Public Services Usage (Simulated Data)")
 
     # Service type filter
-    service_options = df_services['service_type'].unique()
     selected_services = st.sidebar.multiselect("Filter by Service Type:", service_options, default=service_options)
     filtered_df = df_services[df_services['service_type'].isin(selected_services)]
 
@@ -440,47 +530,66 @@ elif category == "Services":
     st.markdown("### Planned vs. Actual Service Usage Trends")
     st.markdown("This chart separates each service into its own pane for a clearer, more professional comparison of planned vs. actual usage over time.")
     
-    df_melted = filtered_df.melt(
-        id_vars=['year', 'service_type'],
-        value_vars=['planned_usage', 'actual_usage'],
-        var_name='usage_type',
-        value_name='usage_count'
+    # Split the unmelted frame into per-service panes in a single groupby pass
+    service_groups = list(filtered_df.sort_values('year').groupby('service_type', observed=True, sort=False))
+    services = [service for service, _ in service_groups]
+    fig_line = make_subplots(
+        rows=max((len(services) + 1) // 2, 1),
+        cols=2,
+        subplot_titles=services,
+        shared_yaxes=True
     )
-    
-    fig_line = px.line(
-        df_melted,
-        x='year',
-        y='usage_count',
-        color='usage_type',
-        facet_col='service_type',
-        facet_col_wrap=2,
+    usage_colors = dict(zip(['planned_usage', 'actual_usage'], px.colors.qualitative.Plotly))
+    for i, (service, service_df) in enumerate(service_groups):
+        for usage_type, color in usage_colors.items():
+            fig_line.add_trace(
+                go.Scattergl(
+                    x=service_df['year'].to_numpy(),
+                    y=service_df[usage_type].to_numpy(),
+                    mode='lines',
+                    name=usage_type,
+                    legendgroup=usage_type,
+                    showlegend=(i == 0),
+                    line_color=color
+                ),
+                row=i // 2 + 1,
+                col=i % 2 + 1
+            )
+    fig_line.update_layout(
         title='Planned vs. Actual Service Usage Trends by Type',
-        labels={'usage_count': 'Usage Count', 'year': 'Year', 'usage_type': 'Usage Type'},
         template='plotly_white',
+        legend_title_text='Usage Type',
+        height=400
     )
-    fig_line.update_layout(height=400)
-    fig_line.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    fig_line.update_xaxes(showgrid=True)
+    fig_line.update_xaxes(showgrid=True, title_text='Year')
+    # shared_yaxes only links panes within a row; match them all so services share one scale
+    fig_line.update_yaxes(matches='y')
+    fig_line.layout.yaxis.matches = None
+    fig_line.update_yaxes(title_text='Usage Count', col=1)
     st.plotly_chart(fig_line, use_container_width=True)
 
     st.markdown("### Usage Variance by Service Type")
     st.markdown("This bar chart highlights the difference between actual and planned usage, making it easy to see which services are exceeding or falling short of expectations.")
     
-    service_usage_df = filtered_df.groupby('service_type')[['planned_usage', 'actual_usage']].sum().reset_index()
+    service_usage_df = filtered_df.groupby('service_type', observed=True, sort=False)[['planned_usage', 'actual_usage']].sum().reset_index()
     service_usage_df['variance'] = service_usage_df['actual_usage'] - service_usage_df['planned_usage']
     
-    fig_bar = px.bar(
-        service_usage_df,
-        x='service_type',
-        y='variance',
+    fig_bar = go.Figure(go.Bar(
+        x=service_usage_df['service_type'].to_numpy(),
+        y=service_usage_df['variance'].to_numpy()
+    ))
+    fig_bar.update_layout(
         title='Service Usage Variance (Actual - Planned)',
-        labels={'variance': 'Usage Variance', 'service_type': 'Service Type'},
         template='plotly_white',
+        xaxis_title='Service Type',
+        yaxis_title='Usage Variance'
     )
     st.plotly_chart(fig_bar, use_container_width=True)
 
-elif category == "Demographics":
+@st.fragment
+def _demographics_view():
     df_demographics = load_and_preprocess_demographics()
+    st.warning("This data is simulated for demonstration purposes. A real-world application would use actual demographic data.")
     st.subheader("Demographic Insights (Simulated Data)")
 
     # Year slider
@@ -511,36 +620,65 @@ elif category == "Demographics":
 
     # Visualizations
     st.markdown("### Population Growth by Year")
-    fig_pop = px.line(
-        total_pop,
-        x='year',
-        y='population',
+    fig_pop = go.Figure(go.Scatter(
+        x=total_pop['year'].to_numpy(),
+        y=total_pop['population'].to_numpy(),
+        mode='lines'
+    ))
+    fig_pop.update_layout(
         title='Total Population Over Time',
-        labels={'year': 'Year', 'population': 'Population Count'},
         template='plotly_white',
+        xaxis_title='Year',
+        yaxis_title='Population Count'
     )
     st.plotly_chart(fig_pop, use_container_width=True)
 
     st.markdown("### Population Distribution by Age Group")
-    age_pop = filtered_df.groupby('age_group')['population'].sum().reset_index()
-    fig_bar = px.bar(
-        age_pop,
-        x='age_group',
-        y='population',
+    age_pop = filtered_df.groupby('age_group', observed=True, sort=False)['population'].sum().reset_index()
+    fig_bar = go.Figure(go.Bar(
+        x=age_pop['age_group'].to_numpy(),
+        y=age_pop['population'].to_numpy()
+    ))
+    fig_bar.update_layout(
         title='Population by Age Group',
-        labels={'age_group': 'Age Group', 'population': 'Population Count'},
         template='plotly_white',
-        category_orders={"age_group": ['0-14', '15-29', '30-44', '45-59', '60-74', '75+']}
+        xaxis_title='Age Group',
+        yaxis_title='Population Count',
+        xaxis={'categoryorder': 'array', 'categoryarray': ['0-14', '15-29', '30-44', '45-59', '60-74', '75+']}
     )
     st.plotly_chart(fig_bar, use_container_width=True)
 
+# --- Sidebar for Navigation ---
+st.sidebar.header("Explore Data Categories")
+category = st.sidebar.radio(
+    "Select a category:",
+    ["Decisions", "People", "Budgets", "Projects", "Services", "Demographics"]
+)
+
+# --- Dynamic Content based on selected category ---
+st.sidebar.markdown("---")
+st.sidebar.header("Filter Options")
+
+if category == "Decisions":
+    _decisions_view()
+elif category == "People":
+    _people_view()
+elif category == "Budgets":
+    _budgets_view()
+elif category == "Projects":
+    _projects_view()
+elif category == "Services":
+    _services_view()
+elif category == "Demographics":
+    _demographics_view()
+
 # --- Instructions to Run the App ---
 st.sidebar.markdown("---")
 st.sidebar.markdown("""
 ### How to Run this App:
 1.  Save the code as `heidelberg_dashboard.py`.
 2.  Ensure you have the required packages installed:
-    `pip install streamlit pandas plotly-express folium requests`
+    `pip install streamlit pandas pyarrow plotly-express folium streamlit-folium`
 3.  Run the app from your terminal:
     `streamlit run heidelberg_dashboard.py`
 """)
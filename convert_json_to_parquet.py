@@ -0,0 +1,58 @@
+import json
+import os
+import pandas as pd
+
+# --- One-time conversion of the OParl JSON exports to Parquet ---
+# The dashboard reads the Parquet files written by this script instead of
+# parsing the raw JSON on every cold start. Re-run it whenever the JSON
+# exports in this directory are refreshed:
+#     python convert_json_to_parquet.py
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Output file name -> (OParl JSON export it is built from, fields the dashboard uses)
+SOURCES = {
+    'decisions.parquet': (
+        'tagesordnungspunkte-ratsinformationssystem-stadt-heidelberg-oparl_33f7b659-43f4-4d57-b43b-30ed5d7802d6.json',
+        ('created', 'result', 'name'),
+    ),
+    'people.parquet': (
+        'personen-ratsinformationssystem-stadt-heidelberg-oparl_f4cff9e2-a2fc-4ba9-a7b0-955e312b72cd.json',
+        ('id', 'name'),
+    ),
+    'orgs.parquet': (
+        'organisationen-ratsinformationssystem-stadt-heidelberg-oparl_c9b68473-42c7-4992-a574-6618caba978c.json',
+        ('id', 'name'),
+    ),
+    'memberships.parquet': (
+        'mitgliedschaften-ratsinformationssystem-stadt-heidelberg-oparl_8c2e8115-15bf-4a03-858a-a4277df36b87.json',
+        ('person', 'organization', 'role', 'startDate'),
+    ),
+}
+
+DATE_COLUMNS = ['created', 'startDate']
+
+
+def convert(json_name, parquet_name, keep):
+    """
+    Projects one OParl JSON export onto the given fields and writes it out as a zstd-compressed Parquet file.
+    """
+    with open(os.path.join(BASE_DIR, json_name), encoding='utf-8') as f:
+        data = json.load(f)
+    rows = data['data']
+    df = pd.DataFrame({k: [r.get(k) for r in rows] for k in keep})
+
+    # Timestamps carry mixed UTC offsets (CET/CEST), so parse straight to UTC and drop the tz.
+    # An explicit ISO8601 format avoids the per-element dateutil fallback.
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True, format='ISO8601').dt.tz_localize(None).astype('datetime64[ns]')
+
+    df.to_parquet(os.path.join(BASE_DIR, parquet_name), engine='pyarrow', compression='zstd')
+    return df
+
+
+if __name__ == '__main__':
+    for parquet_name, (json_name, keep) in SOURCES.items():
+        df = convert(json_name, parquet_name, keep)
+        print(f"Wrote {parquet_name} ({df.shape[0]} rows, {df.shape[1]} columns)")